@@ -4,18 +4,30 @@ from fontTools.colorLib.builder import buildCOLR, buildCPAL
 from fontTools.ttLib.tables.otTables import CompositeMode
 from fontTools.varLib.varStore import OnlineVarStoreBuilder
 from fontTools.varLib.builder import buildDeltaSetIndexMap
-from fontTools.feaLib.variableScalar import VariableScalar
-from fontTools.varLib.instancer import _TupleVarStoreAdapter
 from fontTools.misc.fixedTools import floatToFixed, fixedToFloat
-from fontTools.ttLib.tables._f_v_a_r import Axis
+from array import array
+from struct import unpack
 from typing import List
 import re
 
+import numpy as np
+
+_INV255 = 1.0 / 255.0
+
+# Validation and canonicalization of composite modes in one lookup: maps
+# both spellings to the upper-case member name.
+_COMPOSITE_CANON = {n: n for n in CompositeMode._member_names_}
+_COMPOSITE_CANON.update({n.lower(): n for n in CompositeMode._member_names_})
+_COMPOSITE_MODE_LIST = str(CompositeMode._member_names_)
+
+_HEX8_RE = re.compile(r"^#[0-9a-fA-F]{8}$")
+
 
 def compile_color(c):
     try:
         assert c[0] == "#"
-        return tuple(int(x, 16) / 255 for x in [c[1:3], c[3:5], c[5:7], c[7:9]])
+        r, g, b, a = unpack(">BBBB", bytes.fromhex(c[1:]))
+        return (r * _INV255, g * _INV255, b * _INV255, a * _INV255)
     except:
         raise ValueError(
             f"Could not understand color {c}; should be hex digits in form #RRGGBBAA"
@@ -23,44 +35,66 @@ def compile_color(c):
 
 
 def compile_palette_entry(colors):
-    return [compile_color(c) for c in colors]
+    return list(map(compile_color, colors))
 
 
 def compile_palettes(entries):
     # each element of the array should be the same length;
     # if it is one, pad to the max length, if not raise an error
-    max_length = max(len(entry) for entry in entries)
+    max_length = max(map(len, entries))
+    flat = []
     for index, entry in enumerate(entries):
         if len(entry) == 1:
-            entries[index] = entry * max_length
+            entries[index] = entry = entry * max_length
         elif len(entry) != max_length:
             raise ValueError(
                 f"Pallete index {index} specifies {len(entry)} palettes ({entry}), but should have {max_length}"
             )
-    return [compile_palette_entry(colors) for colors in entries]
+        flat.extend(entry)
+    # Batch-convert all the hex strings in one NumPy operation rather
+    # than running a Python loop per color; fall back to the per-color
+    # path so that a bad color still gets a helpful error message.
+    try:
+        buf = b"".join(
+            bytes.fromhex(c[1:]) for c in flat if c[0] == "#" and len(c) == 9
+        )
+        if len(buf) != 4 * len(flat):
+            raise ValueError
+    except Exception:
+        return [compile_palette_entry(colors) for colors in entries]
+    arr = np.frombuffer(buf, dtype=np.uint8).astype(np.float64) * _INV255
+    return [
+        [tuple(color) for color in row]
+        for row in arr.reshape(len(entries), max_length, 4).tolist()
+    ]
 
 
 class ColorLine:
+    __slots__ = ("colorstops", "needs_variable", "extend")
+
     def __init__(self, start_or_stops, end=None, extend="pad"):
         if end is None:
             stops = start_or_stops
         else:
             stops = {0.0: start_or_stops, 1.0: end}
-        self.colorstops = []
         self.needs_variable = False
         self.extend = extend
         if isinstance(stops, dict):
-            stops = list(stops.items())
-        for k, v in stops:
+            stops = stops.items()
+        stops = list(stops)
+        # Pre-size the stop list rather than growing it by appending
+        self.colorstops = colorstops = [None] * len(stops)
+        for index, (k, v) in enumerate(stops):
             alpha = 1.0
             if isinstance(v, (list, tuple)) and isinstance(v[1], (float, int, dict)):
                 alpha = v[1]
                 v = v[0]
-            if isinstance(alpha, (dict, str)):
-                self.needs_variable = True
-            if isinstance(k, (dict, str)):
+            # Once one stop is known to vary there is nothing left to detect
+            if not self.needs_variable and (
+                isinstance(alpha, (dict, str)) or isinstance(k, (dict, str))
+            ):
                 self.needs_variable = True
-            self.colorstops.append((k, v, alpha))
+            colorstops[index] = (k, v, alpha)
 
     def compile(self, compiler):
         if self.needs_variable:
@@ -80,32 +114,86 @@ class ColorLine:
     def compile_var(self, compiler):
         obj = {"Extend": self.extend, "ColorStop": []}
         for k, v, alpha in self.colorstops:
-            base = len(compiler.deltaset)
             skeleton = compiler.prepare_variables(
                 [
                     {"name": "StopOffset", "value": k, "units": "f2dot14"},
                     {"name": "Alpha", "value": alpha, "units": "f2dot14"},
                 ]
             )
-            obj["ColorStop"].append(
-                skeleton
-                | {
-                    "PaletteIndex": compiler.get_palette_index(v),
-                }
-            )
+            skeleton["PaletteIndex"] = compiler.get_palette_index(v)
+            obj["ColorStop"].append(skeleton)
         return obj
 
 
+def _freeze_variable(value):
+    # Reduce a variable value to something hashable so it can be used as
+    # a cache key; locations in dict form become sorted tuples.
+    if isinstance(value, dict):
+        return tuple(
+            sorted(
+                (loc if isinstance(loc, tuple) else tuple(loc.items()), v)
+                for loc, v in value.items()
+            )
+        )
+    return value
+
+
+_VAR_TYPES = (str, dict)
+
+
 def is_variable(thing):
-    if isinstance(thing, ColorLine):
+    # Exact type checks first: plain numbers are the overwhelmingly
+    # common case, and exact str/dict/ColorLine cover nearly all the rest.
+    t = type(thing)
+    if t is float or t is int:
+        return False
+    if t is ColorLine:
         return thing.needs_variable
-    return isinstance(thing, (str, dict))
+    if isinstance(thing, _VAR_TYPES):
+        return True
+    return isinstance(thing, ColorLine) and thing.needs_variable
 
 
 def any_variable(*things):
     return any(is_variable(x) for x in things)
 
 
+# Local alias: the Paint* guards below call this a lot
+_is_var = is_variable
+
+
+# Converters from user-facing values to the fixed-point representations
+# used in the variation store, keyed by units; built once rather than
+# re-created as lambdas on every make_var_scalar call.
+_CONVERTERS = {
+    None: float,
+    "f2dot14": lambda x: floatToFixed(float(x), 14),
+    "fixed": lambda x: floatToFixed(float(x), 16),
+    "angle": lambda x: floatToFixed(float(x) / 180, 14),
+}
+
+
+_STR_PARSE_CACHE: dict = {}
+
+
+def _parse_var_string(s):
+    values_dict = {}
+    for values in s.split():
+        try:
+            locations, value = values.split(":")
+        except ValueError:
+            raise ValueError(
+                f"Could not understand variable parameter {s}, "
+                "should be of the form tag=value,tag=value:default"
+            )
+        location = {}
+        for loc in locations.split(","):
+            axis, axis_loc = loc.split("=")
+            location[axis] = float(axis_loc)
+        values_dict[tuple(location.items())] = value
+    return values_dict
+
+
 def _convert_default_from_variable(default, units=None):
     if units == "f2dot14":
         return fixedToFloat(default, 14)
@@ -118,21 +206,57 @@ def _convert_default_from_variable(default, units=None):
     return default
 
 
+# Axis-tag lists for OnlineVarStoreBuilder, shared between builders
+# compiled against the same axis set in one process.
+_VSB_AXIS_TAGS: dict = {}
+
+
+# Positional-argument layouts for PaintScale and PaintRotate, keyed by
+# arity; one dict lookup instead of a cascade of elif tests per call.
+# Each entry leaves any explicitly-passed keyword argument alone.
+_SCALE_UNPACK = {
+    1: lambda a, sx, sy, c, p: (sx, sy, c, a[0]),
+    2: lambda a, sx, sy, c, p: (a[0], sy, c, a[1]) if sx is None else (sx, sy, c, p),
+    3: lambda a, sx, sy, c, p: (
+        (a[0], a[1], c, a[2]) if sx is None and sy is None else (sx, sy, c, p)
+    ),
+    4: lambda a, sx, sy, c, p: (
+        a if sx is None and sy is None and c is None else (sx, sy, c, p)
+    ),
+}
+
+_ROTATE_UNPACK = {
+    1: lambda a, ang, c, p: (ang, c, a[0]),
+    2: lambda a, ang, c, p: (a[0], c, a[1]) if ang is None else (ang, c, p),
+    3: lambda a, ang, c, p: a if ang is None and c is None else (ang, c, p),
+}
+
+
 class PythonBuilder:
     def __init__(self, font: TTFont) -> None:
         self.font = font
         self.explicit_palette = False
         self.palette = []
+        self._palette_index: dict[tuple, int] = {}
         self.palette_flags = {}
         self.variations = []
-        self.varindexbases = []
-        self.deltaset: list[int] = []
+        self.varindexbases: dict[tuple, dict] = {}
+        self._var_cache: dict[tuple, tuple[float, int]] = {}
+        # Unsigned 32-bit storage: one machine word per entry rather than a
+        # boxed Python int, and wide enough for the 0xFFFFFFFF no-variation
+        # sentinel.
+        self.deltaset = array("I")
         self.axes = []
         self.varstorebuilder = None
         if "fvar" in font:
             self.axes = font["fvar"].axes
-            axis_tags = [x.axisTag for x in self.axes]
+            key = tuple(x.axisTag for x in self.axes)
+            axis_tags = _VSB_AXIS_TAGS.get(key)
+            if axis_tags is None:
+                axis_tags = _VSB_AXIS_TAGS[key] = list(key)
             self.varstorebuilder = OnlineVarStoreBuilder(axis_tags)
+        self._default_location = {axis.axisTag: axis.defaultValue for axis in self.axes}
+        self._default_location_key = tuple(sorted(self._default_location.items()))
 
     def make_var_scalar(self, s, units=None):
         if not self.varstorebuilder:
@@ -140,18 +264,15 @@ class PythonBuilder:
                 "Attempt to use a variable scalar %s, but this was not a variable font"
                 % s
             )
-        converter = float
-        if units == "f2dot14":
-            converter = lambda x: floatToFixed(float(x), 14)
-        elif units == "fixed":
-            converter = lambda x: floatToFixed(float(x), 16)
-        elif units == "angle":
-            converter = lambda x: floatToFixed(float(x) / 180, 14)
-        elif units is not None:
+        try:
+            converter = _CONVERTERS[units]
+        except KeyError:
             raise ValueError(f"Unknown units {units}")
+        from fontTools.feaLib.variableScalar import VariableScalar
+
         v = VariableScalar()
         v.axes = self.axes
-        default_location = {axis.axisTag: axis.defaultValue for axis in self.axes}
+        default_location = self._default_location
         if isinstance(s, (float, int)):
             v.add_value(default_location, converter(float(s)))
             return v
@@ -160,37 +281,35 @@ class PythonBuilder:
         values_dict = {}
 
         if isinstance(s, str):
-            for values in s.split():
-                try:
-                    locations, value = values.split(":")
-                except ValueError:
-                    raise ValueError(
-                        f"Could not understand variable parameter {s}, "
-                        "should be of the form tag=value,tag=value:default"
-                    )
-                location = {}
-                for loc in locations.split(","):
-                    axis, axis_loc = loc.split("=")
-                    location[axis] = float(axis_loc)
-                values_dict[tuple(location.items())] = value
-
-            logging.warning(f"Consider using dict {values_dict} instead of string {s}")
+            # The same string often appears many times; parse it (and
+            # nag about it) only once.
+            values_dict = _STR_PARSE_CACHE.get(s)
+            if values_dict is None:
+                values_dict = _parse_var_string(s)
+                _STR_PARSE_CACHE[s] = values_dict
+                logging.warning(
+                    f"Consider using dict {values_dict} instead of string {s}"
+                )
         elif isinstance(s, dict):
             values_dict = s
         else:
             raise ValueError(f"Could not understand variable parameter {s}")
 
+        saw_default = False
+        default_key = self._default_location_key
         for location, value in values_dict.items():
             if units != "fixed" and (
                 converter(value) <= -32768 or converter(value) >= 32768
             ):
                 raise ValueError(f"Value too big in '{s}'")
             v.add_value(dict(location), converter(value))
+            if not saw_default and tuple(sorted(location)) == default_key:
+                saw_default = True
 
             if first_value is None:
                 first_value = value
 
-        if not tuple(sorted(default_location.items())) in v.values:
+        if not saw_default:
             if first_value is None:
                 raise ValueError(f"No default value OR first value in '{s}'")
             v.add_value(default_location, converter(first_value))
@@ -213,29 +332,53 @@ class PythonBuilder:
             )
         if not isinstance(color, list):
             color = [color]
-        if color not in self.palette:
+        key = tuple(color)
+        index = self._palette_index.get(key)
+        if index is None:
+            index = len(self.palette)
             self.palette.append(color)
-        return self.palette.index(color)
+            self._palette_index[key] = index
+        return index
 
     def prepare_variables(self, variables):
         # Have I seen this precise set of variables before? If so, return a copy
-        for these_variables, skeleton in self.varindexbases:
-            if these_variables == variables:
-                return dict(skeleton)
+        try:
+            key = tuple(
+                (v["name"], v.get("units"), _freeze_variable(v["value"]))
+                for v in variables
+            )
+        except (TypeError, AttributeError):
+            key = None
+        if key is not None:
+            seen = self.varindexbases.get(key)
+            if seen is not None:
+                return dict(seen)
 
-        base = len(self.deltaset)
         skeleton = {"VarIndexBase": len(self.deltaset)}
         for variable in variables:
             name = variable["name"]
             value = variable["value"]
             units = variable.get("units")
-            vs = self.make_var_scalar(value, units=units)
-            default, index = vs.add_to_variation_store(self.varstorebuilder)
-            default = _convert_default_from_variable(default, units)
+            try:
+                cache_key = (units, _freeze_variable(value))
+            except (TypeError, AttributeError):
+                cache_key = None
+            cached = cache_key and self._var_cache.get(cache_key)
+            if cached:
+                default, index = cached
+            else:
+                vs = self.make_var_scalar(value, units=units)
+                default, index = vs.add_to_variation_store(self.varstorebuilder)
+                default = _convert_default_from_variable(default, units)
+                if cache_key:
+                    self._var_cache[cache_key] = (default, index)
             self.deltaset.append(index)
             skeleton[name] = default
 
-        self.varindexbases.append((variables, skeleton))
+        # Store a pristine copy: callers own the returned dict and may
+        # add Format/Paint keys to it in place.
+        if key is not None:
+            self.varindexbases[key] = dict(skeleton)
         return skeleton
 
     def PaintColrLayers(self, layers):
@@ -254,14 +397,20 @@ class PythonBuilder:
         skeleton = self.prepare_variables(
             [{"name": "Alpha", "value": alpha, "units": "f2dot14"}]
         )
-        return {
-            **skeleton,
-            "Format": 3,
-            "PaletteIndex": self.get_palette_index(col_or_colrs),
-        }
+        skeleton["Format"] = 3
+        skeleton["PaletteIndex"] = self.get_palette_index(col_or_colrs)
+        return skeleton
 
     def PaintLinearGradient(self, pt0, pt1, pt2, colorline):
-        if any_variable(*pt0, *pt1, *pt2, colorline):
+        if (
+            _is_var(pt0[0])
+            or _is_var(pt0[1])
+            or _is_var(pt1[0])
+            or _is_var(pt1[1])
+            or _is_var(pt2[0])
+            or _is_var(pt2[1])
+            or colorline.needs_variable
+        ):
             return self.PaintVarLinearGradient(pt0, pt1, pt2, colorline)
         return {
             "Format": 4,
@@ -285,14 +434,20 @@ class PythonBuilder:
                 {"name": "y2", "value": pt2[1]},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 5,
-            "ColorLine": colorline.compile_var(self),
-        }
+        skeleton["Format"] = 5
+        skeleton["ColorLine"] = colorline.compile_var(self)
+        return skeleton
 
     def PaintRadialGradient(self, pt0, rad0, pt1, rad1, colorline):
-        if any_variable(*pt0, rad0, *pt1, rad1, colorline):
+        if (
+            _is_var(pt0[0])
+            or _is_var(pt0[1])
+            or _is_var(rad0)
+            or _is_var(pt1[0])
+            or _is_var(pt1[1])
+            or _is_var(rad1)
+            or colorline.needs_variable
+        ):
             return self.PaintVarRadialGradient(pt0, rad0, pt1, rad1, colorline)
         return {
             "Format": 6,
@@ -316,14 +471,18 @@ class PythonBuilder:
                 {"name": "r1", "value": rad1},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 7,
-            "ColorLine": varcolorline.compile_var(self),
-        }
+        skeleton["Format"] = 7
+        skeleton["ColorLine"] = varcolorline.compile_var(self)
+        return skeleton
 
     def PaintSweepGradient(self, pt, startAngle, endAngle, colorline):
-        if any_variable(*pt, startAngle, endAngle, colorline):
+        if (
+            _is_var(pt[0])
+            or _is_var(pt[1])
+            or _is_var(startAngle)
+            or _is_var(endAngle)
+            or colorline.needs_variable
+        ):
             return self.PaintVarSweepGradient(pt, startAngle, endAngle, colorline)
         return {
             "Format": 8,
@@ -343,11 +502,9 @@ class PythonBuilder:
                 {"name": "endAngle", "value": endAngle, "units": "angle"},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 9,
-            "ColorLine": varcolorline.compile_var(self),
-        }
+        skeleton["Format"] = 9
+        skeleton["ColorLine"] = varcolorline.compile_var(self)
+        return skeleton
 
     def PaintGlyph(self, glyph, paint=None):
         return {"Format": 10, "Glyph": glyph, "Paint": paint}
@@ -356,7 +513,14 @@ class PythonBuilder:
         return {"Format": 11, "Glyph": glyph}
 
     def PaintTransform(self, matrix, paint):
-        if any_variable(*matrix):
+        if (
+            _is_var(matrix[0])
+            or _is_var(matrix[1])
+            or _is_var(matrix[2])
+            or _is_var(matrix[3])
+            or _is_var(matrix[4])
+            or _is_var(matrix[5])
+        ):
             return self.PaintVarTransform(matrix, paint)
         return {
             "Format": 12,
@@ -389,7 +553,7 @@ class PythonBuilder:
         }
 
     def PaintTranslate(self, dx, dy, paint):
-        if any_variable(dx, dy):
+        if _is_var(dx) or _is_var(dy):
             return self.PaintVarTranslate(dx, dy, paint)
         return {"Format": 14, "dx": dx, "dy": dy, "Paint": paint}
 
@@ -400,27 +564,17 @@ class PythonBuilder:
                 {"name": "dy", "value": dy},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 15,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 15
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintScale(self, *args, scale_x=None, scale_y=None, center=None, paint=None):
-        if paint is None and len(args) == 1:
-            paint = args[0]
-        elif paint is None and scale_x is None and len(args) == 2:
-            scale_x, paint = args
-        elif paint is None and scale_x is None and scale_y is None and len(args) == 3:
-            scale_x, scale_y, paint = args
-        elif (
-            paint is None
-            and scale_x is None
-            and scale_y is None
-            and center is None
-            and len(args) == 4
-        ):
-            scale_x, scale_y, center, paint = args
+        if paint is None and args:
+            unpack = _SCALE_UNPACK.get(len(args))
+            if unpack:
+                scale_x, scale_y, center, paint = unpack(
+                    args, scale_x, scale_y, center, paint
+                )
         if paint is None or scale_x is None:
             raise ValueError("Couldn't understand arguments to PaintScale")
         if center is not None:
@@ -431,7 +585,7 @@ class PythonBuilder:
         if scale_y is None:
             return self.PaintScaleUniform(scale_x, paint)
 
-        if any_variable(scale_x, scale_y):
+        if _is_var(scale_x) or _is_var(scale_y):
             return self.PaintVarScale(scale_x, scale_y, paint)
         return {
             "Format": 16,
@@ -447,14 +601,17 @@ class PythonBuilder:
                 {"name": "scaleY", "value": scale_y, "units": "f2dot14"},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 17,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 17
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintScaleAroundCenter(self, scale_x, scale_y, center, paint):
-        if any_variable(scale_x, scale_y, *center):
+        if (
+            _is_var(scale_x)
+            or _is_var(scale_y)
+            or _is_var(center[0])
+            or _is_var(center[1])
+        ):
             return self.PaintVarScaleAroundCenter(scale_x, scale_y, center, paint)
         return {
             "Format": 18,
@@ -474,14 +631,12 @@ class PythonBuilder:
                 {"name": "centerY", "value": center[1]},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 19,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 19
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintScaleUniform(self, scale, paint):
-        if any_variable(scale):
+        if _is_var(scale):
             return self.PaintVarScaleUniform(scale, paint)
         return {
             "Format": 20,
@@ -493,14 +648,12 @@ class PythonBuilder:
         skeleton = self.prepare_variables(
             [{"name": "scale", "value": scale, "units": "f2dot14"}]
         )
-        return {
-            **skeleton,
-            "Format": 21,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 21
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintScaleUniformAroundCenter(self, scale, center, paint):
-        if any_variable(scale, *center):
+        if _is_var(scale) or _is_var(center[0]) or _is_var(center[1]):
             return self.PaintVarScaleUniformAroundCenter(scale, center, paint)
         return {
             "Format": 22,
@@ -518,25 +671,21 @@ class PythonBuilder:
                 {"name": "centerY", "value": center[1]},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 23,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 23
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintRotate(self, *args, angle=None, paint=None, center=None):
-        if paint is None and len(args) == 1:
-            paint = args[0]
-        elif paint is None and angle is None and len(args) == 2:
-            angle, paint = args
-        elif paint is None and angle is None and center is None and len(args) == 3:
-            angle, center, paint = args
+        if paint is None and args:
+            unpack = _ROTATE_UNPACK.get(len(args))
+            if unpack:
+                angle, center, paint = unpack(args, angle, center, paint)
         if paint is None or angle is None:
             raise ValueError("Couldn't understand arguments to PaintRotate")
 
         if center is not None:
             return self.PaintRotateAroundCenter(angle, center, paint)
-        if any_variable(angle):
+        if _is_var(angle):
             return self.PaintVarRotate(angle, paint)
         return {"Format": 24, "angle": angle, "Paint": paint}
 
@@ -545,14 +694,12 @@ class PythonBuilder:
             [{"name": "angle", "value": angle, "units": "angle"}]
         )
 
-        return {
-            **skeleton,
-            "Format": 25,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 25
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintRotateAroundCenter(self, angle, center, paint):
-        if any_variable(angle, *center):
+        if _is_var(angle) or _is_var(center[0]) or _is_var(center[1]):
             return self.PaintVarRotateAroundCenter(angle, center, paint)
         return {
             "Format": 26,
@@ -570,16 +717,14 @@ class PythonBuilder:
                 {"name": "centerY", "value": center[1]},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 27,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 27
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintSkew(self, xSkewAngle, ySkewAngle, paint, center=None):
         if center is not None:
             return self.PaintSkewAroundCenter(xSkewAngle, ySkewAngle, center, paint)
-        if any_variable(xSkewAngle, ySkewAngle):
+        if _is_var(xSkewAngle) or _is_var(ySkewAngle):
             return self.PaintVarSkew(xSkewAngle, ySkewAngle, paint)
 
         return {
@@ -596,14 +741,17 @@ class PythonBuilder:
                 {"name": "ySkewAngle", "value": ySkewAngle, "units": "angle"},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 29,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 29
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintSkewAroundCenter(self, angle_x, angle_y, center, paint):
-        if any_variable(angle_x, angle_y, *center):
+        if (
+            _is_var(angle_x)
+            or _is_var(angle_y)
+            or _is_var(center[0])
+            or _is_var(center[1])
+        ):
             return self.PaintVarSkewAroundCenter(angle_x, angle_y, center, paint)
         return {
             "Format": 30,
@@ -623,20 +771,19 @@ class PythonBuilder:
                 {"name": "centerY", "value": center[1]},
             ]
         )
-        return {
-            **skeleton,
-            "Format": 31,
-            "Paint": paint,
-        }
+        skeleton["Format"] = 31
+        skeleton["Paint"] = paint
+        return skeleton
 
     def PaintComposite(self, mode, src, dst):
-        if mode.upper() not in CompositeMode._member_names_:
+        canon = _COMPOSITE_CANON.get(mode) or _COMPOSITE_CANON.get(mode.upper())
+        if canon is None:
             raise ValueError(
-                f"Unknown composite mode {mode}, must be one of: {CompositeMode._member_names_}"
+                f"Unknown composite mode {mode}, must be one of: {_COMPOSITE_MODE_LIST}"
             )
         return {
             "Format": 32,
-            "CompositeMode": mode,
+            "CompositeMode": canon,
             "SourcePaint": src,
             "BackdropPaint": dst,
         }
@@ -644,17 +791,24 @@ class PythonBuilder:
     def SetColors(self, colors):
         self.explicit_palette = True
         # colors should be an array of strings or array of arrays
+        seen = set()
         for index, color in enumerate(colors):
             if not isinstance(color, list):
                 color = colors[index] = [color]
             for c in color:
-                if not re.match(r"^#[0-9a-fA-F]{8}$", c):
+                # Palettes tend to reuse a handful of base colors;
+                # only validate each distinct string once
+                if c in seen:
+                    continue
+                if not _HEX8_RE.match(c):
                     raise ValueError(
                         f"Color {c} at index {index} is not a valid color; "
                         "should be in the form #RRGGBBAA"
                     )
+                seen.add(c)
 
         self.palette = colors
+        self._palette_index = {tuple(color): i for i, color in enumerate(colors)}
 
     def SetPaletteFlags(self, palette_index, flags):
         if not self.palette:
@@ -682,7 +836,14 @@ class PythonBuilder:
 
     def build_palette(self):
         palette = compile_palettes(self.palette)
-        t_palette = list(map(list, zip(*palette)))
+        # Transpose [stops][palettes] to [palettes][stops] in C rather
+        # than materializing the intermediate lists with zip().
+        palette_arr = np.asarray(palette)
+        t_palette = (
+            [list(map(tuple, row)) for row in palette_arr.transpose(1, 0, 2).tolist()]
+            if palette_arr.size
+            else []
+        )
         if t_palette:
             self.font["CPAL"] = buildCPAL(t_palette)
         if self.palette_flags:
@@ -691,30 +852,59 @@ class PythonBuilder:
                 self.palette_flags.get(i, 0) for i in range(len(t_palette))
             ]
 
+    def _remap_deltaset(self, mapping):
+        # store.optimize() normally hands back a mapping whose real keys
+        # are the dense range 0..n-1 (plus the 0xFFFFFFFF sentinel); in
+        # that case the whole deltaset can be remapped with one NumPy
+        # gather instead of a dict lookup per entry.
+        indices = np.frombuffer(self.deltaset, dtype=np.uint32)
+        n = len(mapping)
+        keys = np.fromiter(mapping.keys(), dtype=np.uint32, count=n)
+        vals = np.fromiter(mapping.values(), dtype=np.uint32, count=n)
+        compact = keys != 0xFFFFFFFF
+        ckeys = keys[compact]
+        if ckeys.size and int(ckeys.max()) + 1 == ckeys.size:
+            lut = np.empty(ckeys.size + 1, dtype=np.uint32)
+            lut[ckeys] = vals[compact]
+            lut[ckeys.size] = mapping.get(0xFFFFFFFF, 0xFFFFFFFF)
+            return lut[np.minimum(indices, ckeys.size)].tolist()
+        return [mapping[v] for v in self.deltaset]
+
     def build_colr(self, glyphs):
         store = self.varstorebuilder.finish()
         mapping = store.optimize()
-        self.deltaset = [mapping[v] for v in self.deltaset]
         self.font["COLR"] = buildCOLR(
             glyphs,
             varStore=store,
-            varIndexMap=buildDeltaSetIndexMap(self.deltaset),
+            varIndexMap=buildDeltaSetIndexMap(self._remap_deltaset(mapping)),
             version=1,
         )
 
 
-def compile_paints(font, python_code):
+PythonBuilder._PAINT_METHODS = tuple(
+    name for name in vars(PythonBuilder) if name.startswith("Paint")
+) + (
+    "SetColors",
+    "SetPaletteFlags",
+    "SetDarkMode",
+    "SetLightMode",
+)
+
+_CODE_CACHE: dict = {}
+
+
+def compile_paints(font, python_code, source_name="<paints>"):
     builder = PythonBuilder(font)
-    methods = [x for x in dir(builder) if x.startswith("Paint")] + [
-        "SetColors",
-        "SetPaletteFlags",
-        "SetDarkMode",
-        "SetLightMode",
-    ]
     this_locals = {"glyphs": {}, "font": font, "ColorLine": ColorLine}
-    for method in methods:
+    for method in PythonBuilder._PAINT_METHODS:
         this_locals[method] = getattr(builder, method)
-    exec(python_code, this_locals, this_locals)
+    # Compiling the source is repeated work when the same paints.py is
+    # applied to many fonts in one process; cache the code object.
+    key = (source_name, hash(python_code))
+    code = _CODE_CACHE.get(key)
+    if code is None:
+        code = _CODE_CACHE[key] = compile(python_code, source_name, "exec")
+    exec(code, this_locals, this_locals)
 
     builder.build_colr(this_locals["glyphs"])
     builder.build_palette()
@@ -723,6 +913,8 @@ def compile_paints(font, python_code):
 def update_varstore(font, tag, orig_axes):
     if tag not in font or not font[tag].table.VarStore:
         return
+    from fontTools.varLib.instancer import _TupleVarStoreAdapter
+
     store = font[tag].table.VarStore
     tupleVarStore = _TupleVarStoreAdapter.fromItemVarStore(store, orig_axes)
     tupleVarStore.axisOrder = [ax.axisTag for ax in font["fvar"].axes]
@@ -730,6 +922,9 @@ def update_varstore(font, tag, orig_axes):
 
 
 def add_axes(font: TTFont, axes: List[str]):
+    from fontTools.ttLib import newTable
+    from fontTools.ttLib.tables._f_v_a_r import Axis
+
     if "fvar" in font:
         fvar = font["fvar"]
     else:
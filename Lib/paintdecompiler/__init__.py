@@ -9,10 +9,61 @@ from fontTools.misc.fixedTools import (
     floatToFixedToFloat,
 )
 import re
+from functools import partial
+
+NO_VARIATION_INDEX = 0xFFFFFFFF
+
+_WORD_RE = re.compile(r"\w+")
+
+# Argument patterns like "(x0, y0), (x1, y1), " are compiled once into
+# straight-line f-string functions ("f'({tidy(paint.get(\"x0\"))}, ...'")
+# and cached here, so _format is a single call with no per-token regex or
+# format_map key loop.
+_FMT_FUNCS = {}
+
+
+def _compile_format(pattern):
+    body = _WORD_RE.sub(lambda w: '{tidy(paint.get("' + w[0] + '"))}', pattern)
+    ns = {}
+    exec("def _fmt(paint, tidy):\n    return f'" + body + "'", ns)
+    return ns["_fmt"]
+
 
 angle_convertor = lambda x: fixedToFloat(x, 14) * 180
 f2dot14_convertor = lambda x: fixedToFloat(x, 14)
 fixed_converter = lambda x: fixedToFloat(x, 16)
+_identity = lambda x: x
+
+# (name, element, convertor) specs for the handlers whose elements mix
+# convertors, gathered in one pass by get_variations_mixed.
+_SWEEP_SPECS = (
+    ("centerX", 0, None),
+    ("centerY", 1, None),
+    ("startAngle", 2, angle_convertor),
+    ("endAngle", 3, angle_convertor),
+)
+_SCALE_AROUND_CENTER_SPECS = (
+    ("scaleX", 0, f2dot14_convertor),
+    ("scaleY", 1, f2dot14_convertor),
+    ("centerX", 2, None),
+    ("centerY", 3, None),
+)
+_SCALE_UNIFORM_AROUND_CENTER_SPECS = (
+    ("scale", 0, f2dot14_convertor),
+    ("centerX", 1, None),
+    ("centerY", 2, None),
+)
+_ROTATE_AROUND_CENTER_SPECS = (
+    ("angle", 0, angle_convertor),
+    ("centerX", 1, None),
+    ("centerY", 2, None),
+)
+_SKEW_AROUND_CENTER_SPECS = (
+    ("xSkewAngle", 0, angle_convertor),
+    ("ySkewAngle", 1, angle_convertor),
+    ("centerX", 2, None),
+    ("centerY", 3, None),
+)
 
 
 def region_tuple(region, fvar):
@@ -34,69 +85,142 @@ def list_get(l, i, default=None):
 class PythonUnbuilder:
     def __init__(self, palettes, table, fvar=None, precision=14) -> None:
         self.palettes = palettes
+        # Formatted palette references, filled in by color2py; each index
+        # is rendered once however many paints cite it.
+        self._color_strs = {}
         self.variations = table.VarStore
         self.varindexmap = table.VarIndexMap
         self.fvar = fvar
         self.precision = precision
+        # The delta-set index map is consulted for every variable element of
+        # every paint; pre-split each entry into its (outer, inner) pair, with
+        # None marking the no-variation sentinel, so the hot path is a single
+        # list index and an is-None test.
+        self._mapping_decoded = (
+            [
+                None if m == NO_VARIATION_INDEX else (m >> 16, m & 0xFFFF)
+                for m in self.varindexmap.mapping
+            ]
+            if self.varindexmap
+            else None
+        )
+        # Region strings are the same for every element that references
+        # them; memoize per region index, and per VarData for the list that
+        # get_variation walks.
+        self._region_cache = {}
+        self._vardata_regions = {}
+        # Delta rows are shared between paints; decode each distinct
+        # (outer, inner, convertor) row once and reuse the converted list.
+        self._decoded_rows = {}
+        self._scale_uniform_convertor = lambda l: floatToFixedToFloat(
+            fixedToFloat(l, 14), precision
+        )
+        self._tidy_float = partial(floatToFixedToStr, precisionBits=precision)
+        # Resolve paint dispatch once, keyed by the raw format integer, so
+        # paint2py doesn't rebuild a PaintFormat instance and re-resolve the
+        # handler attribute for every node of the paint tree.  The handlers
+        # are plain functions (looked up on the class), called fn(self, paint).
+        self._names = {fmt.value: fmt.name for fmt in PaintFormat}
+        self._handlers = {
+            fmt.value: getattr(type(self), fmt.name + "_args", None)
+            for fmt in PaintFormat
+        }
+
+    def _region_tuple(self, ix):
+        rv = self._region_cache.get(ix)
+        if rv is None:
+            rv = self._region_cache[ix] = region_tuple(
+                self.variations.VarRegionList.Region[ix], self.fvar
+            )
+        return rv
+
+    def _regions_for(self, outer, vardata):
+        regions = self._vardata_regions.get(outer)
+        if regions is None:
+            regions = self._vardata_regions[outer] = [
+                self._region_tuple(ix) for ix in vardata.VarRegionIndex
+            ]
+        return regions
 
     def get_variations(self, paint, names, base_element=0, convertor=None):
+        if "VarIndexBase" not in paint:
+            return {name: paint.get(name) for name in names}
+        var_base = paint["VarIndexBase"] + base_element
         return {
-            name: self.get_variation(paint, base_element + ix, name, convertor)
+            name: self._get_variation(var_base + ix, paint.get(name), convertor)
             for ix, name in enumerate(names)
         }
 
+    def get_variations_mixed(self, paint, specs):
+        if "VarIndexBase" not in paint:
+            return {name: paint.get(name) for name, element, convertor in specs}
+        var_base = paint["VarIndexBase"]
+        return {
+            name: self._get_variation(var_base + element, paint.get(name), convertor)
+            for name, element, convertor in specs
+        }
+
     def get_variation(self, paint, element, name, convertor=None):
-        if convertor is None:
-            convertor = lambda x: x
         base_value = paint.get(name)
         if "VarIndexBase" not in paint:
             return base_value
-        index = paint["VarIndexBase"] + element
-        if index == 4294967295:
+        return self._get_variation(
+            paint["VarIndexBase"] + element, base_value, convertor
+        )
+
+    def _get_variation(self, index, base_value, convertor):
+        if convertor is None:
+            convertor = _identity
+        if index == NO_VARIATION_INDEX:
             return base_value
-        mapping = self.varindexmap.mapping[index]
-        if mapping == 4294967295:
+        decoded = self._mapping_decoded[index]
+        if decoded is None:
             return base_value
-        outer, inner = mapping >> 16, mapping & 0xFFFF
+        outer, inner = decoded
         vardata = self.variations.VarData[outer]
-        regions = [
-            region_tuple(self.variations.VarRegionList.Region[ix], self.fvar)
-            for ix in vardata.VarRegionIndex
-        ]
-        data = vardata.Item[inner]
-        if not regions or not data:
+        regions = self._regions_for(outer, vardata)
+        key = (outer, inner, convertor)
+        decoded = self._decoded_rows.get(key)
+        if decoded is None:
+            decoded = self._decoded_rows[key] = [
+                convertor(d) for d in vardata.Item[inner]
+            ]
+        if not regions or not decoded:
             return base_value
         variations = {"": base_value}
-        for r, d in zip(regions, data):
-            variations[r] = base_value + convertor(d)
+        for r, d in zip(regions, decoded):
+            variations[r] = base_value + d
         return variations
 
     def color2py(self, index):
-        cols = ['"' + str(list_get(pal, index, "None")) + '"' for pal in self.palettes]
-        if len(cols) > 1:
-            return f"[{', '.join(cols)}]"
-        return cols[0]
+        rv = self._color_strs.get(index)
+        if rv is None:
+            cols = [
+                '"' + str(list_get(pal, index, "None")) + '"' for pal in self.palettes
+            ]
+            rv = self._color_strs[index] = (
+                f"[{', '.join(cols)}]" if len(cols) > 1 else cols[0]
+            )
+        return rv
 
     def colorstop2py(self, colorstop, offset=True):
-        rv = ""
+        parts = []
         if offset:
-            rv += (
+            parts.append(
                 self._tidy(
-                    self.get_variation(
-                        colorstop, 0, "StopOffset", lambda r: fixedToFloat(r, 14)
-                    )
+                    self.get_variation(colorstop, 0, "StopOffset", f2dot14_convertor)
                 )
-                + ":"
             )
-        alpha = self.get_variation(colorstop, 1, "Alpha", lambda r: fixedToFloat(r, 14))
+            parts.append(":")
+        alpha = self.get_variation(colorstop, 1, "Alpha", f2dot14_convertor)
         if alpha != 1.0:
-            rv += "{"
-            rv += f"color: {self.color2py(colorstop['PaletteIndex'])},"
-            rv += f"alpha: {self._tidy(alpha)},"
-            rv += "}"
+            parts.append("{")
+            parts.append(f"color: {self.color2py(colorstop['PaletteIndex'])},")
+            parts.append(f"alpha: {self._tidy(alpha)},")
+            parts.append("}")
         else:
-            rv += self.color2py(colorstop["PaletteIndex"])
-        return rv
+            parts.append(self.color2py(colorstop["PaletteIndex"]))
+        return "".join(parts)
 
     def colorline2py(self, colorline):
         if (
@@ -104,206 +228,213 @@ class PythonUnbuilder:
             and colorline["ColorStop"][0]["StopOffset"] == 0.0
             and colorline["ColorStop"][1]["StopOffset"] == 1.0
         ):
-            stop = (
-                self.colorstop2py(colorline["ColorStop"][0], offset=False)
-                + ", "
-                + self.colorstop2py(colorline["ColorStop"][1], offset=False)
+            stop = ", ".join(
+                (
+                    self.colorstop2py(colorline["ColorStop"][0], offset=False),
+                    self.colorstop2py(colorline["ColorStop"][1], offset=False),
+                )
             )
         else:
-            stop = (
-                "{"
-                + ",".join(self.colorstop2py(stop) for stop in colorline["ColorStop"])
-                + "}"
+            stop = "".join(
+                (
+                    "{",
+                    ",".join(
+                        self.colorstop2py(stop) for stop in colorline["ColorStop"]
+                    ),
+                    "}",
+                )
             )
         extend = ""
         if colorline["Extend"] != "pad":
-            extend = 'extend="' + colorline.get("Extend") + '"'
+            extend = f'extend="{colorline.get("Extend")}"'
         return f"ColorLine({stop}, {extend})"
 
     def _tidy(self, number):
-        if isinstance(number, float):
-            return floatToFixedToStr(number, self.precision)
+        # Exact-type check first: every numeric paint field arrives as a
+        # plain float, so the common case is one prebound C call.  Fields
+        # carrying variation dicts (or ints) fall through to str.
+        if type(number) is float or isinstance(number, float):
+            return self._tidy_float(number)
         return str(number)
 
     def _format(self, paint, pattern, variable=False):
-        return re.sub(r"\w+", lambda w: self._tidy(paint.get(w[0])), pattern)
-
-    def PaintColrLayers_args(self, paint):
-        rv = ", ".join([self.paint2py(x) for x in paint["Layers"]])
-        return f"[{rv}],"
-
-    def PaintSolid_args(self, paint):
-        rv = self.color2py(paint["PaletteIndex"])
+        fn = _FMT_FUNCS.get(pattern)
+        if fn is None:
+            fn = _FMT_FUNCS[pattern] = _compile_format(pattern)
+        return fn(paint, self._tidy)
+
+    # The *_args handlers append their fragments straight into the caller's
+    # output list rather than returning strings, so nothing below paint2py
+    # ever rebuilds a concatenated child expression.
+
+    def PaintColrLayers_args(self, paint, out):
+        out.append("[")
+        for ix, layer in enumerate(paint["Layers"]):
+            if ix:
+                out.append(", ")
+            self._paint2py_into(layer, out)
+        out.append("],")
+
+    def PaintSolid_args(self, paint, out):
+        out.append(self.color2py(paint["PaletteIndex"]))
         if paint["Alpha"] != 1.0:
-            rv += f", alpha={self._tidy(paint['Alpha'])}"
-        return rv
+            out.append(f", alpha={self._tidy(paint['Alpha'])}")
 
-    def PaintVarSolid_args(self, paint):
-        rv = self.color2py(paint["PaletteIndex"])
-        alpha = self.get_variation(paint, 0, "Alpha", lambda r: fixedToFloat(r, 14))
+    def PaintVarSolid_args(self, paint, out):
+        out.append(self.color2py(paint["PaletteIndex"]))
+        alpha = self.get_variation(paint, 0, "Alpha", f2dot14_convertor)
         if alpha != 1.0:
-            rv += f", alpha={self._tidy(alpha)}"
-        return rv
+            out.append(f", alpha={self._tidy(alpha)}")
 
-    def PaintLinearGradient_args(self, paint):
-        return self._format(
-            paint, "(x0, y0), (x1, y1), (x2, y2), "
-        ) + self.colorline2py(paint["ColorLine"])
+    def PaintLinearGradient_args(self, paint, out):
+        out.append(self._format(paint, "(x0, y0), (x1, y1), (x2, y2), "))
+        out.append(self.colorline2py(paint["ColorLine"]))
 
-    def PaintVarLinearGradient_args(self, paint):
+    def PaintVarLinearGradient_args(self, paint, out):
         p = self.get_variations(paint, ["x0", "y0", "x1", "y1", "x2", "y2"])
-        return self._format(p, "(x0, y0), (x1, y1), (x2, y2), ") + self.colorline2py(
-            paint["ColorLine"]
-        )
+        out.append(self._format(p, "(x0, y0), (x1, y1), (x2, y2), "))
+        out.append(self.colorline2py(paint["ColorLine"]))
 
-    def PaintRadialGradient_args(self, paint):
-        return self._format(paint, "(x0, y0), r0, (x1, y1), r1, ") + self.colorline2py(
-            paint["ColorLine"]
-        )
+    def PaintRadialGradient_args(self, paint, out):
+        out.append(self._format(paint, "(x0, y0), r0, (x1, y1), r1, "))
+        out.append(self.colorline2py(paint["ColorLine"]))
 
-    def PaintVarRadialGradient_args(self, paint):
+    def PaintVarRadialGradient_args(self, paint, out):
         p = self.get_variations(paint, ["x0", "y0", "r0", "x1", "y1", "r1"])
-        return self._format(p, "(x0, y0), r0, (x1, y1), r1, ") + self.colorline2py(
-            paint["ColorLine"]
-        )
+        out.append(self._format(p, "(x0, y0), r0, (x1, y1), r1, "))
+        out.append(self.colorline2py(paint["ColorLine"]))
 
-    def PaintSweepGradient_args(self, paint):
-        return self._format(
-            paint, "(centerX, centerY), startAngle, endAngle,"
-        ) + self.colorline2py(paint["ColorLine"])
+    def PaintSweepGradient_args(self, paint, out):
+        out.append(self._format(paint, "(centerX, centerY), startAngle, endAngle,"))
+        out.append(self.colorline2py(paint["ColorLine"]))
 
-    def PaintVarSweepGradient_args(self, paint):
-        p = self.get_variations(paint, ["centerX", "centerY"]) | self.get_variations(
-            paint, ["startAngle", "endAngle"], base_element=2, convertor=angle_convertor
-        )
-        return self._format(
-            p, "(centerX, centerY), startAngle, endAngle,"
-        ) + self.colorline2py(paint["ColorLine"])
+    def PaintVarSweepGradient_args(self, paint, out):
+        p = self.get_variations_mixed(paint, _SWEEP_SPECS)
+        out.append(self._format(p, "(centerX, centerY), startAngle, endAngle,"))
+        out.append(self.colorline2py(paint["ColorLine"]))
 
-    def PaintGlyph_args(self, paint):
-        rv = '"' + paint.get("Glyph") + '", '
-        return rv
+    def PaintGlyph_args(self, paint, out):
+        out.append('"' + paint.get("Glyph") + '", ')
 
-    def PaintColrGlyph_args(self, paint):
-        rv = '"' + paint.get("Glyph") + '", '
-        return rv
+    def PaintColrGlyph_args(self, paint, out):
+        out.append('"' + paint.get("Glyph") + '", ')
 
-    def PaintTransform_args(self, paint):
-        rv = self._format(paint.get("Transform"), "(xx, yx, xy, yy, dx, dy), ")
-        return rv
+    def PaintTransform_args(self, paint, out):
+        out.append(self._format(paint.get("Transform"), "(xx, yx, xy, yy, dx, dy), "))
 
-    def PaintVarTransform_args(self, paint):
+    def PaintVarTransform_args(self, paint, out):
         p = self.get_variations(
             paint["Transform"],
             ["xx", "yx", "xy", "yy", "dx", "dy"],
             convertor=fixed_converter,
         )
-        rv = self._format(p, "(xx, yx, xy, yy, dx, dy), ")
-        return rv
+        out.append(self._format(p, "(xx, yx, xy, yy, dx, dy), "))
 
-    def PaintTranslate_args(self, paint):
-        rv = self._format(paint, "dx, dy,")
-        return rv
+    def PaintTranslate_args(self, paint, out):
+        out.append(self._format(paint, "dx, dy,"))
 
-    def PaintVarTranslate_args(self, paint):
+    def PaintVarTranslate_args(self, paint, out):
         p = self.get_variations(
             paint,
             ["dx", "dy"],
         )
-        rv = self._format(p, "dx, dy,")
-        return rv
+        out.append(self._format(p, "dx, dy,"))
 
-    def PaintComposite_args(self, paint):
-        rv = self.paint2py(paint["SourcePaint"])
+    def PaintComposite_args(self, paint, out):
+        self._paint2py_into(paint["SourcePaint"], out)
         if paint.get("BackdropPaint"):
-            rv += ", " + self.paint2py(paint["BackdropPaint"])
+            out.append(", ")
+            self._paint2py_into(paint["BackdropPaint"], out)
         if paint.get("CompositeMode") and paint["CompositeMode"] != "dest_over":
-            rv += f", mode='{paint['CompositeMode']}'"
-        return rv
+            out.append(f", mode='{paint['CompositeMode']}'")
 
-    def PaintScale_args(self, paint):
-        return self._format(paint, "scaleX, scaleY,")
+    def PaintScale_args(self, paint, out):
+        out.append(self._format(paint, "scaleX, scaleY,"))
 
-    def PaintVarScale_args(self, paint):
+    def PaintVarScale_args(self, paint, out):
         p = self.get_variations(
             paint, ["scaleX", "scaleY"], convertor=f2dot14_convertor
         )
-        return self._format(p, "scaleX, scaleY,")
+        out.append(self._format(p, "scaleX, scaleY,"))
 
-    def PaintScaleAroundCenter_args(self, paint):
-        return self._format(paint, "scaleX, scaleY, (centerX, centerY),")
+    def PaintScaleAroundCenter_args(self, paint, out):
+        out.append(self._format(paint, "scaleX, scaleY, (centerX, centerY),"))
 
-    def PaintVarScaleAroundCenter_args(self, paint):
-        p = self.get_variations(
-            paint, ["scaleX", "scaleY"], convertor=f2dot14_convertor
-        ) | self.get_variations(paint, ["centerX", "centerY"], base_element=2)
-        return self._format(p, "scaleX, scaleY, (centerX, centerY), ")
+    def PaintVarScaleAroundCenter_args(self, paint, out):
+        p = self.get_variations_mixed(paint, _SCALE_AROUND_CENTER_SPECS)
+        out.append(self._format(p, "scaleX, scaleY, (centerX, centerY), "))
 
-    def PaintScaleUniform_args(self, paint):
-        return self._format(paint, "scale,")
+    def PaintScaleUniform_args(self, paint, out):
+        out.append(self._format(paint, "scale,"))
 
-    def PaintVarScaleUniform_args(self, paint):
+    def PaintVarScaleUniform_args(self, paint, out):
         scale_variation = self.get_variation(
-            paint,
-            0,
-            "scale",
-            lambda l: floatToFixedToFloat(fixedToFloat(l, 14), self.precision),
+            paint, 0, "scale", self._scale_uniform_convertor
         )
-        return str(scale_variation) + ","
+        out.append(str(scale_variation) + ",")
 
-    def PaintScaleUniformAroundCenter_args(self, paint):
-        return self._format(paint, "scale, (centerX, centerY),")
+    def PaintScaleUniformAroundCenter_args(self, paint, out):
+        out.append(self._format(paint, "scale, (centerX, centerY),"))
 
-    def PaintVarScaleUniformAroundCenter_args(self, paint):
-        p = self.get_variations(
-            paint, ["scale"], convertor=f2dot14_convertor
-        ) | self.get_variations(paint, ["centerX", "centerY"], base_element=1)
-        return self._format(p, "scale, (centerX, centerY), ")
+    def PaintVarScaleUniformAroundCenter_args(self, paint, out):
+        p = self.get_variations_mixed(paint, _SCALE_UNIFORM_AROUND_CENTER_SPECS)
+        out.append(self._format(p, "scale, (centerX, centerY), "))
 
-    def PaintRotate_args(self, paint):
-        return self._tidy(paint["angle"]) + ","
+    def PaintRotate_args(self, paint, out):
+        out.append(self._tidy(paint["angle"]) + ",")
 
-    def PaintVarRotate_args(self, paint):
+    def PaintVarRotate_args(self, paint, out):
         p = self.get_variations(paint, ["angle"], convertor=angle_convertor)
-        return self._format(p, "angle, ")
+        out.append(self._format(p, "angle, "))
 
-    def PaintRotateAroundCenter_args(self, paint):
-        return self._format(paint, "angle, (centerX, centerY),")
+    def PaintRotateAroundCenter_args(self, paint, out):
+        out.append(self._format(paint, "angle, (centerX, centerY),"))
 
-    def PaintVarRotateAroundCenter_args(self, paint):
-        p = self.get_variations(
-            paint, ["angle"], convertor=angle_convertor
-        ) | self.get_variations(paint, ["centerX", "centerY"], base_element=1)
-        return self._format(p, "angle, (centerX, centerY), ")
+    def PaintVarRotateAroundCenter_args(self, paint, out):
+        p = self.get_variations_mixed(paint, _ROTATE_AROUND_CENTER_SPECS)
+        out.append(self._format(p, "angle, (centerX, centerY), "))
 
-    def PaintSkew_args(self, paint):
-        return self._format(paint, "xSkewAngle, ySkewAngle,")
+    def PaintSkew_args(self, paint, out):
+        out.append(self._format(paint, "xSkewAngle, ySkewAngle,"))
 
-    def PaintVarSkew_args(self, paint):
+    def PaintVarSkew_args(self, paint, out):
         p = self.get_variations(
             paint, ["xSkewAngle", "ySkewAngle"], convertor=angle_convertor
         )
-        return self._format(p, "xSkewAngle, ySkewAngle,")
+        out.append(self._format(p, "xSkewAngle, ySkewAngle,"))
 
-    def PaintSkewAroundCenter_args(self, paint):
-        return self._format(paint, "xSkewAngle, ySkewAngle, (centerX, centerY), ")
+    def PaintSkewAroundCenter_args(self, paint, out):
+        out.append(self._format(paint, "xSkewAngle, ySkewAngle, (centerX, centerY), "))
 
-    def PaintVarSkewAroundCenter_args(self, paint):
-        p = self.get_variations(
-            paint, ["xSkewAngle", "ySkewAngle"], convertor=angle_convertor
-        ) | self.get_variations(paint, ["centerX", "centerY"], base_element=2)
-        return self._format(p, "xSkewAngle, ySkewAngle, (centerX, centerY), ")
+    def PaintVarSkewAroundCenter_args(self, paint, out):
+        p = self.get_variations_mixed(paint, _SKEW_AROUND_CENTER_SPECS)
+        out.append(self._format(p, "xSkewAngle, ySkewAngle, (centerX, centerY), "))
 
     def paint2py(self, paint):
-        pformat = PaintFormat(paint["Format"])
-        if hasattr(self, pformat.name + "_args"):
-            rv = pformat.name + "(" + getattr(self, pformat.name + "_args")(paint)
-        else:
-            rv = pformat.name + "(NotImplemented, "
-        if paint.get("Paint"):
-            rv += self.paint2py(paint["Paint"])
-        rv += ")"
-        return rv
+        out = []
+        self._paint2py_into(paint, out)
+        return "".join(out)
+
+    def _paint2py_into(self, paint, out):
+        # Walk the Paint child chain with an explicit loop, appending
+        # fragments that are joined once at the top.  Deep transform
+        # chains therefore cost neither a Python frame per link nor
+        # repeated string concatenation; Layers/Source/Backdrop subtrees
+        # re-enter through their handlers.
+        closes = 0
+        while True:
+            fmt = paint["Format"]
+            fn = self._handlers.get(fmt)
+            out.append(self._names[fmt] + "(")
+            if fn is not None:
+                fn(self, paint, out)
+            else:
+                out.append("NotImplemented, ")
+            closes += 1
+            paint = paint.get("Paint")
+            if not paint:
+                break
+        out.append(")" * closes)
 
 
 def main(args=None):
@@ -340,14 +471,25 @@ def main(args=None):
         palettes, table=colr, fvar=font.get("fvar"), precision=14
     )
 
-    output = ""
-    for glyph, description in colorGlyphs.items():
-        line = f"glyphs['{glyph}'] = {unbuilder.paint2py(description)}\n"
-        try:
-            line = format_file_contents(line, fast=True, mode=Mode(line_length=78))
-        except:
-            pass
-        output += line
+    lines = [
+        f"glyphs['{glyph}'] = {unbuilder.paint2py(description)}\n"
+        for glyph, description in colorGlyphs.items()
+    ]
+    try:
+        # Format the whole file in one go; black's parser setup then
+        # amortizes across all glyphs.
+        output = format_file_contents(
+            "".join(lines), fast=True, mode=Mode(line_length=78)
+        )
+    except:
+        # One unformattable glyph shouldn't leave the rest raw.
+        output = ""
+        for line in lines:
+            try:
+                line = format_file_contents(line, fast=True, mode=Mode(line_length=78))
+            except:
+                pass
+            output += line
 
     with open(args.output, "w") as fh:
         fh.write(output)